@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+import logging
+import os
+import shutil
+
+logger = logging.getLogger(__name__)
+
+# scheduler commands Nextflow calls for each executor
+EXECUTORS = {
+    'local': [],
+    'slurm': ['sbatch', 'squeue', 'scancel'],
+    'sge': ['qsub', 'qstat', 'qdel'],
+}
+
+DEFAULT_QUEUE_SIZE = {
+    'slurm': 100,
+    'sge': 100,
+}
+
+# nodes asking for at least this much memory (GB) go to the highmem queue
+HIGHMEM_THRESHOLD = 64
+
+
+def to_number(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    if value <= 0:
+        return None
+    return int(value) if value.is_integer() else value
+
+
+def check_executor(executor):
+    if executor not in EXECUTORS:
+        raise Exception(
+            f"Unknown executor: {executor}. Choose one of {', '.join(EXECUTORS)}")
+
+    missing = [cmd for cmd in EXECUTORS[executor] if shutil.which(cmd) is None]
+    if len(missing) > 0:
+        raise Exception(
+            f"Executor {executor} requires {', '.join(missing)} on PATH")
+
+
+def get_queue_size(params):
+    if params.queue_size:
+        return params.queue_size
+    if params.executor == 'local':
+        return os.cpu_count() or 1
+    return DEFAULT_QUEUE_SIZE[params.executor]
+
+
+def get_node_queue(node_memory, node_gpu, params):
+    if node_gpu and params.gpu_queue:
+        return params.gpu_queue
+    if node_memory and node_memory >= HIGHMEM_THRESHOLD and params.highmem_queue:
+        return params.highmem_queue
+    return params.queue
+
+
+def get_node_max_forks(node_cpu, params):
+    # local queueSize is the cpu budget of the host, share it by cpu request
+    return max(1, int(get_queue_size(params) // (node_cpu or 1)))
+
+
+def get_node_directives(node_cpu, node_memory, node_gpu, params):
+    node_cpu = to_number(node_cpu)
+    node_memory = to_number(node_memory)
+    node_gpu = to_number(node_gpu)
+
+    if params.executor == 'local':
+        return [f"maxForks {get_node_max_forks(node_cpu, params)}"]
+
+    directives = []
+
+    queue = get_node_queue(node_memory, node_gpu, params)
+    if queue:
+        directives.append(f"queue '{queue}'")
+
+    if node_gpu:
+        if params.executor == 'slurm':
+            directives.append(f"clusterOptions '--gres=gpu:{int(node_gpu)}'")
+        elif params.executor == 'sge' and params.sge_gpu_resource:
+            directives.append(
+                f"clusterOptions '-l {params.sge_gpu_resource}={int(node_gpu)}'")
+
+    return directives
+
+
+def write_executor_config(params):
+    content = [
+        "// Generated by nf-convert, do not edit",
+        "executor {",
+        f"    queueSize       = {get_queue_size(params)}",
+    ]
+    if params.executor != 'local' and params.submit_rate_limit:
+        content.append(
+            f"    submitRateLimit = '{params.submit_rate_limit}'")
+    if params.executor != 'local':
+        # poll the scheduler less aggressively to avoid throttling
+        content += [
+            "    pollInterval      = '30 sec'",
+            "    queueStatInterval = '1 min'",
+        ]
+    content.append("}")
+    if params.executor == 'sge' and params.sge_penv:
+        content += [
+            "process {",
+            f"    penv = '{params.sge_penv}'",
+            "}",
+        ]
+
+    with open(f"{params.output_dir}/conf/executor.config", "w") as f:
+        print("\n".join(content), file=f)
+
+    logger.info(
+        f"Executor {params.executor} with queue size {get_queue_size(params)}")
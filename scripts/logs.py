@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_DIR = "logs"
+LOG_FILE = "convert.log"
+LOG_FORMAT = "[%(levelname)s][%(asctime)s][%(name)s] -- %(message)s"
+
+
+class JsonFormatter(logging.Formatter):
+    def __init__(self, run_id):
+        super().__init__()
+        self.run_id = run_id
+
+    def format(self, record):
+        data = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'run_id': self.run_id,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            data['exc_info'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            data['stack_info'] = self.formatStack(record.stack_info)
+        return json.dumps(data)
+
+
+class RunQueueHandler(QueueHandler):
+    def prepare(self, record):
+        # merge args now but keep exc_info, the listener formats it as a field
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+
+def setup_logging(level):
+    """
+    Log to the console right away and queue records for the run log file,
+    which is only attached once the output directory exists.
+    """
+    log_queue = queue.Queue(-1)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter(LOG_FORMAT))
+    root.addHandler(console)
+    root.addHandler(RunQueueHandler(log_queue))
+
+    return log_queue
+
+
+def start_file_logging(log_queue, output_dir, run_id, max_bytes, backup_count):
+    log_dir = os.path.join(output_dir, LOG_DIR)
+    os.makedirs(log_dir, exist_ok=True)
+
+    file_handler = RotatingFileHandler(
+        os.path.join(log_dir, LOG_FILE), maxBytes=max_bytes, backupCount=backup_count)
+    file_handler.setFormatter(JsonFormatter(run_id))
+
+    # the listener thread does the disk writes, callers only enqueue
+    listener = QueueListener(log_queue, file_handler,
+                             respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -7,6 +7,8 @@ import subprocess
 from distutils.dir_util import copy_tree
 
 import db
+import executor
+import logs
 import utils
 from pipeline import create_nextflow_folder, find_execution_steps
 
@@ -36,25 +38,58 @@ def read_params():
 
     parser.add_argument(
         '--append-log', dest='append_log', help='Append log file for each runtime pipeline', default="run.log")
+
+    parser.add_argument(
+        '-e', '--executor', dest='executor', choices=list(executor.EXECUTORS), default='local', help='Executor profile used to run the pipeline')
+
+    parser.add_argument(
+        '--queue', dest='queue', default=None, help='Default scheduler queue/partition')
+
+    parser.add_argument(
+        '--gpu-queue', dest='gpu_queue', default=None, help='Scheduler queue for nodes requesting GPUs')
+
+    parser.add_argument(
+        '--highmem-queue', dest='highmem_queue', default=None, help=f'Scheduler queue for nodes requesting at least {executor.HIGHMEM_THRESHOLD}GB of memory')
+
+    parser.add_argument(
+        '--sge-penv', dest='sge_penv', default=None, help='SGE parallel environment for multi-cpu processes, eg. smp')
+
+    parser.add_argument(
+        '--sge-gpu-resource', dest='sge_gpu_resource', default=None, help='SGE resource name used to request GPUs, eg. gpu')
+
+    parser.add_argument(
+        '--queue-size', dest='queue_size', type=int, default=None, help='Maximum number of jobs queued at the same time. For local it is the cpu budget split into per-process maxForks (default: CPUs of the host)')
+
+    parser.add_argument(
+        '--submit-rate-limit', dest='submit_rate_limit', default='10/1min', help='Maximum job submission rate, eg. 10/1min')
+
+    parser.add_argument(
+        '--stage-inputs', dest='stage_inputs', choices=['none', 'symlink', 'hardlink'], default='none', help='Link inputs shared by several nodes into a content-addressed staging area')
+
+    parser.add_argument(
+        '--stage-min-size', dest='stage_min_size', type=float, default=0, help='Only stage shared inputs of at least this size (MB)')
+
+    parser.add_argument(
+        '--log-level', dest='log_level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], default='INFO', help='Log level of the converter')
+
+    parser.add_argument(
+        '--log-max-bytes', dest='log_max_bytes', type=int, default=10 * 1024 * 1024, help='Rotate the run log file when it reaches this size')
+
+    parser.add_argument(
+        '--log-backup-count', dest='log_backup_count', type=int, default=5, help='Number of rotated run log files to keep')
     args = parser.parse_args()
     return args
 
 
 def main():
-    logging.basicConfig(
-        format="[%(levelname)s][%(asctime)s][%(name)s] -- %(message)s")
+    params = read_params()
 
+    log_queue = logs.setup_logging(params.log_level)
     logger = logging.getLogger("ConvertPipeline")
-    logger.setLevel(logging.INFO)
-    fh = logging.FileHandler('spam.log')
-    fh.setLevel(logging.DEBUG)
-    logger.addHandler(fh)
 
     script_dir = os.path.abspath(os.path.dirname(__file__))
     template_dir = os.path.abspath(os.path.dirname(script_dir)) + "/template"
 
-    params = read_params()
-
     with open(params.run_config, 'r') as f:
         data = json.load(f)
         # run_id:"pipeline_5hasl371j6ukshy3ycet5q"
@@ -89,7 +124,7 @@ def main():
         try:
             pipeline_data = find_execution_steps(data)
         except Exception as e:
-            logger.info(f'Failed load pipeline data', e)
+            logger.error(f'Failed load pipeline data: {e}')
             pipeline_data = pipeline_data[0].get('nodes', [])
             exit(1)
 
@@ -104,6 +139,9 @@ def main():
             pass
         copy_tree(template_dir, params.output_dir)
 
+    logs.start_file_logging(log_queue, params.output_dir, params.run_id,
+                            params.log_max_bytes, params.log_backup_count)
+
     utils.write_to_checkpoint(params, run_metadata)
 
     try:
@@ -122,14 +160,27 @@ def main():
 
     if params.run_pipeline:
 
+        try:
+            executor.check_executor(params.executor)
+        except Exception as e:
+            logger.error(f"Invalid executor: {e}")
+            run_metadata["server_time"] = utils.now()
+            run_metadata["status"] = 'run_error'
+            run_metadata["error_message"] = str(e)
+            utils.write_to_checkpoint(params, run_metadata)
+            exit(1)
+
         run_metadata["server_time"] = utils.now()
         run_metadata["status"] = 'running'
         utils.write_to_checkpoint(params, run_metadata)
 
         output = ""
         try:
-            output = subprocess.check_output(
-                f"cd {params.output_dir} && nextflow run {main_nf_path} -with-dag -profile conda >>{params.append_log} 2>&1 ", shell=True)
+            with open(os.path.join(params.output_dir, params.append_log), 'ab') as run_log:
+                subprocess.check_call(
+                    ["nextflow", "run", main_nf_path, "-with-dag",
+                     "-profile", f"conda,{params.executor}"],
+                    cwd=params.output_dir, stdout=run_log, stderr=subprocess.STDOUT)
             run_metadata["server_time"] = utils.now()
             run_metadata["status"] = 'run_success'
             utils.write_to_checkpoint(params, run_metadata)
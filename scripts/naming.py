@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+import json
+import logging
+import os
+
+import utils
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "names.manifest.json"
+MIN_ID_LENGTH = 3
+
+
+def get_node_base_name(node):
+    node_params = node.get('app_data', {})
+    node_label = node_params.get('label', None)
+    node_filename = node_params.get('filename', None)
+
+    if node_label is None or len(node_label.strip()) == 0:
+        if node_filename is None:
+            node_label = "node"
+        else:
+            node_label = os.path.basename(node_filename).split(".")[0]
+
+    base_name = utils.to_camel_case(node_label)
+    if len(base_name) == 0:
+        base_name = "node"
+    if base_name[0].isdigit():
+        # Nextflow process names must not start with a digit
+        base_name = "n" + base_name
+    return base_name
+
+
+def load_manifest(manifest_file):
+    try:
+        with open(manifest_file, "r") as f:
+            return json.load(f).get("nodes", {})
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.warning(f"Failed to load name manifest {manifest_file}: {e}")
+        return {}
+
+
+def save_manifest(manifest_file, node_names):
+    with open(manifest_file, "w") as f:
+        json.dump({"nodes": node_names}, f, indent=4, sort_keys=True)
+
+
+def assign_node_names(nodes, reserved=None):
+    """
+    Give every node a unique name made of its label and the shortest
+    prefix of its id (at least MIN_ID_LENGTH chars) that is not shared
+    with any other candidate or reserved name.
+    """
+    reserved = set(reserved or [])
+    pending = {node["id"]: get_node_base_name(node) for node in nodes}
+    lengths = {node_id: MIN_ID_LENGTH for node_id in pending}
+    node_names = {}
+
+    while len(pending) > 0:
+        candidates = {}
+        for node_id, base_name in pending.items():
+            suffix = node_id.replace("-", "")[0:lengths[node_id]]
+            candidates.setdefault(
+                base_name + utils.to_camel_case(suffix), []).append(node_id)
+
+        for name, node_ids in candidates.items():
+            if len(node_ids) == 1 and name not in reserved:
+                node_id = node_ids[0]
+                node_names[node_id] = name
+                reserved.add(name)
+                del pending[node_id]
+                continue
+
+            for node_id in node_ids:
+                if lengths[node_id] >= len(node_id.replace("-", "")):
+                    # id exhausted (duplicated ids), fall back to a counter
+                    counter = 2
+                    while f"{name}{counter}" in reserved:
+                        counter += 1
+                    node_names[node_id] = f"{name}{counter}"
+                    reserved.add(node_names[node_id])
+                    del pending[node_id]
+                else:
+                    lengths[node_id] += 1
+
+    return node_names
+
+
+def resolve_node_names(pipeline_data, output_dir):
+    """
+    Compute the process name of every node once per graph. Names already
+    recorded in the manifest of output_dir are kept so a re-conversion
+    does not invalidate the Nextflow resume cache.
+    """
+    manifest_file = os.path.join(output_dir, MANIFEST_FILE)
+    previous_names = load_manifest(manifest_file)
+
+    node_names = {}
+    new_nodes = []
+    for node in pipeline_data:
+        node_id = node.get("id", None)
+        if node_id is None or node_id in node_names:
+            continue
+        name = previous_names.get(node_id, None)
+        if name is not None and name not in node_names.values():
+            node_names[node_id] = name
+        else:
+            node_names[node_id] = None
+            new_nodes.append(node)
+
+    reserved = [name for name in node_names.values() if name is not None]
+    node_names.update(assign_node_names(new_nodes, reserved))
+
+    save_manifest(manifest_file, node_names)
+    return node_names
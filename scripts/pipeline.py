@@ -1,10 +1,14 @@
 #!/usr/bin/env python3
 import json
+import logging
 import os
 import shutil
 import subprocess
 
+import executor
 import kernel
+import naming
+import staging
 import utils
 
 
@@ -45,28 +49,89 @@ def get_node_by_id(node_list, id):
     return None
 
 
-def get_node_name(node):
-    node_id = node.get('id', None)
+def get_node_name(node, node_names=None):
+    if node_names is not None and node.get('id', None) in node_names:
+        return node_names[node['id']]
+    return naming.assign_node_names([node])[node['id']]
+
+
+def get_node_process_label(node, node_names=None):
+    node_name = get_node_name(node, node_names)
+    process_name = node_name.upper()
+    return process_name
+
+
+def get_node_inputs(node):
     node_params = node.get('app_data', {})
-    node_label = node_params.get('label', None)
-    node_filename = node_params.get('filename', None)
-    if node_filename is not None:
-        node_filename = utils.get_full_path(node_filename)
+    return [i for i in node_params.get('dependencies', []) if len(i.strip()) > 0]
 
-    if node_label == None or len(node_label.strip()) == 0:
-        basename = os.path.basename(node_filename).split(".")[0]
-        node_label = f"{basename}" + "_" + node_id[0:3]
-    else:
-        node_label = node_label + "_" + node_id[0:3]
 
-    node_name = utils.to_camel_case(node_label)
-    return node_name
+def get_upstream_nodes(node, pipeline_data):
+    upstream_node_list = []
+    upstream_inputNodes = []
+    try:
+        upstream_inputNodes = node["inputs"][0]["links"]
+    except:
+        pass
+    for upstream_node in upstream_inputNodes:
+        if upstream_node.get('port_id_ref') == 'outPort':
+            # find node in upstream_inputNodes
+            upstream_node = get_node_by_id(pipeline_data,
+                                           upstream_node.get("node_id_ref"))
+            if upstream_node is not None:
+                upstream_node_list.append(upstream_node)
+    return upstream_node_list
+
+
+def find_upstream_output(node_input_file, upstream_node_list):
+    for upstream_node in upstream_node_list:
+        upstream_node_output_list = [
+            i for i in upstream_node.get("app_data", {}).get("output", []) if len(i.strip()) > 0]
+        for j in range(len(upstream_node_output_list)):
+            if node_input_file == upstream_node_output_list[j]:
+                return upstream_node, j
+    return None
+
 
+def get_input_key(node_input_file):
+    if utils.is_remote_path(node_input_file):
+        return node_input_file
+    return os.path.normpath(node_input_file)
 
-def get_node_process_label(node):
-    node_name = get_node_name(node)
-    process_name = node_name.upper()
-    return process_name
+
+def find_shared_inputs(pipeline_data):
+    """
+    Return the raw inputs (not produced by an upstream node) read by more
+    than one distinct node, keyed by get_input_key and mapped to the name
+    of the channel they share and the path as first listed.
+    """
+    input_count = {}
+    input_path = {}
+    for node in pipeline_data:
+        if node.get('type', None) != 'execution_node' or node.get('op', None) is None:
+            continue
+        if node.get('app_data', {}).get('filename', None) is None:
+            continue
+
+        upstream_node_list = get_upstream_nodes(node, pipeline_data)
+        # count every input once per node
+        node_keys = set()
+        for node_input_file in get_node_inputs(node):
+            if find_upstream_output(node_input_file, upstream_node_list) is not None:
+                continue
+            key = get_input_key(node_input_file)
+            if key in node_keys:
+                continue
+            node_keys.add(key)
+            input_count[key] = input_count.get(key, 0) + 1
+            input_path.setdefault(key, node_input_file)
+
+    shared_inputs = {}
+    for key, count in input_count.items():
+        if count > 1:
+            shared_inputs[key] = (
+                f"shared_input{len(shared_inputs)+1}", input_path[key])
+    return shared_inputs
 
 
 def format_node(node):
@@ -95,6 +160,22 @@ def create_nextflow_folder(pipeline_data, params, logger):
     node_import_nf = []
     node_workflow_nf = []
 
+    node_names = naming.resolve_node_names(pipeline_data, params.output_dir)
+
+    # raw inputs read by several nodes are globbed and staged only once
+    shared_inputs = find_shared_inputs(pipeline_data)
+    shared_input_paths = staging.stage_inputs(
+        [path for _, path in shared_inputs.values()], params)
+    for shared_chanel, path in shared_inputs.values():
+        logger.info(
+            f'Share input {path} as {shared_chanel}: {shared_input_paths[path]}')
+        node_param_nf.append(
+            f'params.{shared_chanel}="{shared_input_paths[path]}"')
+        node_workflow_nf.append(
+            f'{shared_chanel}=Channel.fromPath(params.{shared_chanel}).toSortedList()')
+    if len(shared_inputs) > 0:
+        node_param_nf.append("\n")
+
     c = 0
     for node in pipeline_data:
         c += 1
@@ -103,7 +184,8 @@ def create_nextflow_folder(pipeline_data, params, logger):
         node_group = node.get('op', None)  # notebook-node
 
         logger.info(f"----Process node {c+1}/{len(pipeline_data)}-----")
-        logger.info(json.dumps(format_node(node), indent=4))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(json.dumps(format_node(node)))
 
         if node_type != 'execution_node' or node_group is None:
             logger.warning(
@@ -116,8 +198,8 @@ def create_nextflow_folder(pipeline_data, params, logger):
         node_runtime_yaml = node_params.get('environment_yaml', '')
         node_cpu = node_params.get('cpu', None)
         node_memory = node_params.get('memory', 4)
-        node_input = [i for i in node_params.get(
-            'dependencies', []) if len(i.strip()) > 0]
+        node_gpu = node_params.get('gpu', None)
+        node_input = get_node_inputs(node)
         node_output = [i for i in node_params.get(
             'output', []) if len(i.strip()) > 0]
         node_envar = [i for i in node_params.get(
@@ -132,8 +214,8 @@ def create_nextflow_folder(pipeline_data, params, logger):
                 f"Ignore this node because node_filename={node_filename}")
             continue
 
-        node_name = get_node_name(node)
-        process_name = get_node_process_label(node)
+        node_name = get_node_name(node, node_names)
+        process_name = get_node_process_label(node, node_names)
 
         if node_runtime == '' and len(node_runtime_yaml) > 10:
             node_runtime_new_env = f'{node_name}_env'
@@ -165,6 +247,8 @@ def create_nextflow_folder(pipeline_data, params, logger):
         ]
 
         for i in range(len(node_input)):
+            if get_input_key(node_input[i]) in shared_inputs:
+                continue
             node_param_nf.append(
                 f'params.{node_name}_input{i+1}="{node_input[i]}"')
         for i in range(len(node_output)):
@@ -289,6 +373,9 @@ def create_nextflow_folder(pipeline_data, params, logger):
             if node_cpu:
                 LIMIT_CPU = f"cpus {node_cpu}"
 
+            EXECUTOR_DIRECTIVES = "\n".join(executor.get_node_directives(
+                node_cpu, node_memory, node_gpu, params))
+
             content = '''
             process PROCESS_NAME {
                 tag { PROCESS_TAG }
@@ -298,6 +385,7 @@ def create_nextflow_folder(pipeline_data, params, logger):
 
                 LIMIT_MEMORY
                 LIMIT_CPU
+                EXECUTOR_DIRECTIVES
 
                 input:
                 PROCESS_INPUT
@@ -318,6 +406,8 @@ def create_nextflow_folder(pipeline_data, params, logger):
             content = content.replace('PROCESS_CONDA_HOME_DIR', node_runtime)
             content = content.replace('LIMIT_MEMORY', LIMIT_MEMORY)
             content = content.replace('LIMIT_CPU', LIMIT_CPU)
+            content = content.replace(
+                'EXECUTOR_DIRECTIVES', EXECUTOR_DIRECTIVES)
             content = content.replace('ENVIRONMENT', ENVIRONMENT)
             content = content.replace('PROCESS_INPUT', PROCESS_INPUT)
             content = content.replace('PROCESS_OUTPUT', PROCESS_OUTPUT)
@@ -329,54 +419,29 @@ def create_nextflow_folder(pipeline_data, params, logger):
 
         # write workflow chanel
         node_chanel_nf = []
-        upstream_node_list = []
-
-        try:
-            # array of node
-            upstream_inputNodes = []
-            try:
-                upstream_inputNodes = node["inputs"][0]["links"]
-            except:
-                pass
-            logger.info(
-                f'[{node_name}] Detected  {len(upstream_inputNodes)} upstream nodes')
-            for upstream_node in upstream_inputNodes:
-                if upstream_node['port_id_ref'] == 'outPort':
-                    # find node in upstream_inputNodes
-                    upstream_node = get_node_by_id(pipeline_data,
-                                                   upstream_node["node_id_ref"])
-                    if upstream_node is not None:
-                        upstream_node_list.append(upstream_node)
-                        # upstream_node.output  # array string
-
-        except Exception as e:
-            logger.info(f'Error when get upstream node {e}')
+        upstream_node_list = get_upstream_nodes(node, pipeline_data)
+        logger.info(
+            f'[{node_name}] Detected  {len(upstream_node_list)} upstream nodes')
 
         for i in range(len(node_input)):
             node_input_file = node_input[i]
             # check node is step chanel or from previous step
-            raw_chanel = True
-            try:
-                for upstream_node in upstream_node_list:
-                    upstream_node_output_list = [
-                        i for i in upstream_node["app_data"]["output"] if len(i.strip()) > 0]
-                    for j in range(len(upstream_node_output_list)):
-                        upstream_node_output = upstream_node_output_list[j]
-                        if node_input_file == upstream_node_output:
-                            logger.info(
-                                f'[{node_name}] Write input upstream nodes: {node_input_file}')
-                            # input file in from previous step
-                            upstream_node_process_name = get_node_process_label(
-                                upstream_node)
-                            node_chanel_nf.append(
-                                f'{node_name}_chanel_input{i+1}={upstream_node_process_name}.out.output{j+1}.collect()')
-
-                            raw_chanel = False
-                            break
-            except Exception as e:
-                logger.info(f'Error processing {e}')
-
-            if raw_chanel:
+            upstream_output = find_upstream_output(
+                node_input_file, upstream_node_list)
+            if upstream_output is not None:
+                logger.info(
+                    f'[{node_name}] Write input upstream nodes: {node_input_file}')
+                # input file in from previous step
+                upstream_node, j = upstream_output
+                upstream_node_process_name = get_node_process_label(
+                    upstream_node, node_names)
+                node_chanel_nf.append(
+                    f'{node_name}_chanel_input{i+1}={upstream_node_process_name}.out.output{j+1}.collect()')
+            elif get_input_key(node_input_file) in shared_inputs:
+                shared_chanel, _ = shared_inputs[get_input_key(node_input_file)]
+                node_chanel_nf.append(
+                    f'{node_name}_chanel_input{i+1}={shared_chanel}')
+            else:
                 node_chanel_nf.append(
                     f'{node_name}_chanel_input{i+1}=Channel.fromPath(params.{node_name}_input{i+1}).toSortedList()')
 
@@ -396,6 +461,8 @@ def create_nextflow_folder(pipeline_data, params, logger):
     main_nf = main_nf.replace(
         '/*>>>>>[COMPOSE WORFLOW ]*/', "\n\n".join(node_workflow_nf))
 
+    executor.write_executor_config(params)
+
     with open(f'{params.output_dir}/main.nf', 'w') as f:
         print(main_nf, file=f)
 
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+import glob
+import hashlib
+import json
+import logging
+import os
+
+import utils
+
+logger = logging.getLogger(__name__)
+
+STAGING_DIR = "staging"
+INDEX_FILE = "index.json"
+CHUNK_SIZE = 1024 * 1024
+
+
+def get_fingerprint(path):
+    stat = os.stat(path)
+    return f"{os.path.realpath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def get_file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_directory_digest(path):
+    """
+    Directories are addressed by their listing (relative path, size and
+    mtime of every file) to avoid reading them. Returns the digest and the
+    total size of the files.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            stat = os.stat(file_path)
+            size += stat.st_size
+            digest.update(
+                f"{os.path.relpath(file_path, path)}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest(), size
+
+
+def load_index(index_file):
+    try:
+        with open(index_file, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.warning(f"Failed to load staging index {index_file}: {e}")
+        return {}
+
+
+def link_input(source, target, mode):
+    if os.path.lexists(target):
+        return
+    if mode == 'hardlink' and os.path.isfile(source):
+        try:
+            os.link(source, target)
+            return
+        except OSError as e:
+            # eg. across file systems
+            logger.info(f"Cannot hardlink {source}, use symlink: {e}")
+    os.symlink(source, target)
+
+
+def stage_inputs(input_list, params):
+    """
+    Link every input into a content-addressed staging area of the output
+    directory and return the path each input should be read from. Inputs
+    that are globs, missing or smaller than params.stage_min_size (MB) are
+    returned unchanged.
+    """
+    staged = {path: path for path in input_list}
+    if params.stage_inputs == 'none' or len(input_list) == 0:
+        return staged
+
+    # absolute, nextflow resolves relative params from the output directory
+    staging_dir = os.path.abspath(os.path.join(params.output_dir, STAGING_DIR))
+    index_file = os.path.join(staging_dir, INDEX_FILE)
+    os.makedirs(staging_dir, exist_ok=True)
+    # file digests are only recomputed when the file changes
+    index = load_index(index_file)
+
+    for path in input_list:
+        if glob.has_magic(path) or utils.is_remote_path(path):
+            continue
+        source = path
+        if not os.path.isabs(source):
+            # nextflow is launched from the output directory
+            source = os.path.join(params.output_dir, source)
+        source = os.path.realpath(source)
+        if not os.path.exists(source):
+            logger.info(f"Input {path} does not exist yet, not staged")
+            continue
+
+        if os.path.isdir(source):
+            # the listing walk is the fingerprint itself, it is not cached
+            digest, size = get_directory_digest(source)
+        else:
+            digest, size = None, os.path.getsize(source)
+
+        if params.stage_min_size > 0 and size < params.stage_min_size * 1024 * 1024:
+            continue
+
+        if digest is None:
+            fingerprint = get_fingerprint(source)
+            digest = index.get(fingerprint, None)
+            if digest is None:
+                digest = get_file_digest(source)
+                index[fingerprint] = digest
+
+        target_dir = os.path.join(staging_dir, digest)
+        os.makedirs(target_dir, exist_ok=True)
+        # keep the name the node asked for, source may be a resolved symlink
+        target = os.path.join(
+            target_dir, os.path.basename(os.path.normpath(path)))
+        link_input(source, target, params.stage_inputs)
+        staged[path] = target
+
+    with open(index_file, "w") as f:
+        json.dump(index, f, indent=4)
+
+    return staged
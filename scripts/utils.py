@@ -10,6 +10,11 @@ def get_full_path(path):
     return path
 
 
+def is_remote_path(path):
+    # s3://, gs://, https://, ... are handed to nextflow unchanged
+    return re.match(r'^[a-zA-Z][a-zA-Z0-9+.-]*://', path) is not None
+
+
 def to_camel_case(input_str):
     valid_chars = re.sub(r'[^a-zA-Z0-9]', '', input_str)
     lower_case_str = valid_chars.lower()